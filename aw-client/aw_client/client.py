@@ -1,52 +1,99 @@
 import functools
-import json
 import logging
 import os
+import pickle
+import shutil
 import socket
+import sqlite3
 import threading
-from collections import namedtuple
-from datetime import datetime
-from time import sleep
+from urllib.parse import parse_qs, urlsplit
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import monotonic, sleep
 from typing import (
     Any,
     Callable,
     Dict,
+    Iterator,
     List,
     Optional,
     Tuple,
     Union,
 )
 
-import persistqueue
+import ijson
+import orjson
 import requests as req
+from requests.adapters import HTTPAdapter
 from aw_core.dirs import get_data_dir
 from aw_core.models import Event
 from aw_transform.heartbeats import heartbeat_merge
 
 from .config import load_config
 from .singleinstance import SingleInstance
-from colorama import Fore,init
-
-init(autoreset=True)
 
 # FIXME: This line is probably badly placed
 logging.getLogger("requests").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+_JSON_HEADERS = {"Content-type": "application/json", "charset": "utf-8"}
+
 
 def _log_request_exception(e: req.RequestException):
-    logger.warning(str(e))
-    try:
-        d = e.response.json() if e.response else None
-        logger.warning(f"Error message received: {d}")
-    except json.JSONDecodeError:
-        pass
+    logger.warning("%s", e)
+    # Only decode error bodies that claim to be JSON, not e.g. HTML error pages from a proxy.
+    # NOTE: Response.__bool__ is False for error statuses, so check against None.
+    response = e.response
+    if response is not None and "json" in response.headers.get("Content-Type", ""):
+        try:
+            logger.warning("Error message received: %s", _json(response))
+        except orjson.JSONDecodeError:
+            pass
+
+
+def _dumps(data: Any) -> bytes:
+    # Non-str dict keys (like ints) are converted to strings, as json.dumps does
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _json(r: req.Response) -> Any:
+    """Decodes a JSON response body, parsing the raw UTF-8 bytes directly."""
+    return orjson.loads(r.content)
 
 
 def _dt_is_tzaware(dt: datetime) -> bool:
     return dt.tzinfo is not None and dt.tzinfo.utcoffset(dt) is not None
 
 
+@functools.lru_cache(maxsize=1)
+def _hostname() -> str:
+    return socket.gethostname()
+
+
+@functools.lru_cache(maxsize=1)
+def _config():
+    # Parsed once per process, clients only read from it
+    return load_config()
+
+
+def _gfps_api_url(settings: dict) -> Optional[str]:
+    """Returns the API base URL of the GFPS server, or None if GFPS is disabled."""
+    if not settings.get("gfpsEnabled", False):
+        return None
+    ip = settings.get("gfpsServerIP", "")
+    port = settings.get("gfpsServerPort", "")
+    return f"http://{ip}:{port}/api/0/"
+
+
+def _create_session() -> req.Session:
+    session = req.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def always_raise_for_request_errors(f: Callable[..., req.Response]):
     @functools.wraps(f)
     def g(*args, **kwargs):
@@ -83,11 +130,11 @@ class ActivityWatchClient:
         self.testing = testing
 
         self.client_name = client_name
-        self.client_hostname = socket.gethostname()
+        self.client_hostname = _hostname()
 
-        _config = load_config()
-        server_config = _config["server" if not testing else "server-testing"]
-        client_config = _config["client" if not testing else "client-testing"]
+        config = _config()
+        server_config = config["server" if not testing else "server-testing"]
+        client_config = config["client" if not testing else "client-testing"]
 
         server_host = host or server_config["hostname"]
         server_port = port or server_config["port"]
@@ -98,10 +145,25 @@ class ActivityWatchClient:
         )
 
         self.commit_interval = client_config["commit_interval"]
+        self._commit_interval_td = timedelta(seconds=self.commit_interval)
+
+        # Keep-alive sessions, so that consecutive requests (like heartbeats)
+        # reuse the same connection instead of opening a new one every time.
+        # The external session is used for requests to the GFPS server.
+        self._session = _create_session()
+        self._ext_session = _create_session()
+        # Created on first use, since GFPS mirroring is often not configured
+        self._ext_executor = None  # type: Optional[ThreadPoolExecutor]
+
+        # Server settings, cached since they are needed on every heartbeat
+        self._settings_cache = None  # type: Optional[dict]
+        self._settings_cache_ts = 0.0
 
         self.request_queue = RequestQueue(self)
         # Dict of each last heartbeat in each bucket
         self.last_heartbeat = {}  # type: Dict[str, Event]
+        # Heartbeat endpoints by (bucket_id, pulsetime), to not rebuild them every heartbeat
+        self._heartbeat_endpoints = {}  # type: Dict[Tuple[str, float], str]
 
         self.uuid = ""
 
@@ -113,12 +175,14 @@ class ActivityWatchClient:
         return f"{self.server_address}/api/0/{endpoint}"
 
     @always_raise_for_request_errors
-    def _get(self, endpoint: str, params: Optional[dict] = None) -> req.Response:
-        return req.get(self._url(endpoint), params=params)
+    def _get(
+        self, endpoint: str, params: Optional[dict] = None, stream: bool = False
+    ) -> req.Response:
+        return self._session.get(self._url(endpoint), params=params, stream=stream)
 
     @always_raise_for_request_errors
     def _ext_get(self, url: str, params: Optional[dict] = None) -> req.Response:
-        return req.get(url, params=params)
+        return self._ext_session.get(url, params=params)
 
     @always_raise_for_request_errors
     def _post(
@@ -127,26 +191,24 @@ class ActivityWatchClient:
         data: Union[List[Any], Dict[str, Any]],
         params: Optional[dict] = None,
     ) -> req.Response:
-        headers = {"Content-type": "application/json", "charset": "utf-8"}
-        return req.post(
+        return self._session.post(
             self._url(endpoint),
-            data=bytes(json.dumps(data), "utf8"),
-            headers=headers,
+            data=_dumps(data),
+            headers=_JSON_HEADERS,
             params=params,
         )
 
     @always_raise_for_request_errors
     def _ext_post(
-            self,
-            url: str,
-            data: Union[List[Any], Dict[str, Any]],
-            params: Optional[dict] = None,
+        self,
+        url: str,
+        data: Union[List[Any], Dict[str, Any]],
+        params: Optional[dict] = None,
     ) -> req.Response:
-        headers = {"Content-type": "application/json", "charset": "utf-8"}
-        return req.post(
+        return self._ext_session.post(
             url,
-            data=bytes(json.dumps(data), "utf8"),
-            headers=headers,
+            data=_dumps(data),
+            headers=_JSON_HEADERS,
             params=params,
         )
 
@@ -154,20 +216,22 @@ class ActivityWatchClient:
     def _delete(self, endpoint: str, data: Any = None) -> req.Response:
         if data is None:
             data = {}
-        headers = {"Content-type": "application/json"}
-        return req.delete(self._url(endpoint), data=json.dumps(data), headers=headers)
+        return self._session.delete(
+            self._url(endpoint), data=_dumps(data), headers=_JSON_HEADERS
+        )
 
     @always_raise_for_request_errors
     def _ext_delete(self, url: str, data: Any = None) -> req.Response:
         if data is None:
             data = {}
-        headers = {"Content-type": "application/json"}
-        return req.delete(url, data=json.dumps(data), headers=headers)
+        return self._ext_session.delete(
+            url, data=_dumps(data), headers=_JSON_HEADERS
+        )
 
     def get_info(self):
         """Returns a dict currently containing the keys 'hostname' and 'testing'."""
         endpoint = "info"
-        return self._get(endpoint).json()
+        return _json(self._get(endpoint))
 
     #
     #   Event get/post requests
@@ -178,10 +242,10 @@ class ActivityWatchClient:
         bucket_id: str,
         event_id: int,
     ) -> Optional[Event]:
-        print(Fore.CYAN + "GFP->: get_event" + Fore.RESET)
+        logger.debug("get_event bucket=%s id=%s", bucket_id, event_id)
         endpoint = f"buckets/{bucket_id}/events/{event_id}"
         try:
-            event = self._get(endpoint).json()
+            event = _json(self._get(endpoint))
             return Event(**event)
         except req.exceptions.HTTPError as e:
             if e.response and e.response.status_code == 404:
@@ -196,7 +260,7 @@ class ActivityWatchClient:
         start: Optional[datetime] = None,
         end: Optional[datetime] = None,
     ) -> List[Event]:
-        print(Fore.CYAN + "GFP->: get_events" + Fore.RESET)
+        logger.debug("get_events bucket=%s", bucket_id)
         endpoint = f"buckets/{bucket_id}/events"
 
         params = dict()  # type: Dict[str, str]
@@ -207,17 +271,16 @@ class ActivityWatchClient:
         if end is not None:
             params["end"] = end.isoformat()
 
-        events = self._get(endpoint, params=params).json()
-        return [Event(**event) for event in events]
+        return Event.from_dicts(_json(self._get(endpoint, params=params)))
 
     def insert_event(self, bucket_id: str, event: Event) -> None:
-        print(Fore.CYAN + "GFP->: insert_event" + Fore.RESET)
+        logger.debug("insert_event bucket=%s", bucket_id)
         endpoint = f"buckets/{bucket_id}/events"
         data = [event.to_json_dict()]
         self._post(endpoint, data)
 
     def insert_events(self, bucket_id: str, events: List[Event]) -> None:
-        print(Fore.CYAN + "GFP->: insert_events" + Fore.RESET)
+        logger.debug("insert_events bucket=%s count=%s", bucket_id, len(events))
         endpoint = f"buckets/{bucket_id}/events"
         data = [event.to_json_dict() for event in events]
         self._post(endpoint, data)
@@ -233,7 +296,7 @@ class ActivityWatchClient:
         start: Optional[datetime] = None,
         end: Optional[datetime] = None,
     ) -> int:
-        print(Fore.CYAN + "GFP->: get_eventcount" + Fore.RESET)
+        logger.debug("get_eventcount bucket=%s", bucket_id)
         endpoint = f"buckets/{bucket_id}/events/count"
 
         params = dict()  # type: Dict[str, str]
@@ -266,35 +329,65 @@ class ActivityWatchClient:
               the function will in that case always returns None.
         """
 
-        print(Fore.LIGHTMAGENTA_EX + "\rGFP->: heartbeat " + Fore.RESET + str(bucket_id) + " " + str(pulsetime),end=" ")
-        endpoint = f"buckets/{bucket_id}/heartbeat?pulsetime={pulsetime}"
-        _commit_interval = commit_interval or self.commit_interval
-        settings = self._get("settings", {}).json()
-        gfps_enabled = False
-        if "gfpsEnabled" in settings:
-            gfps_enabled = settings["gfpsEnabled"]
-        gfps_ip = ""
-        if "gfpsServerIP" in settings:
-            gfps_ip = settings["gfpsServerIP"]
-        gfps_port = ""
-        if "gfpsServerPort" in settings:
-            gfps_port = settings["gfpsServerPort"]
-        if gfps_enabled:
-            print(
-                Fore.LIGHTYELLOW_EX + "GFP->POINT(0x00)" + Fore.RESET + ": creating bucket on gfps" + " For user " + str(
-                    self.uuid), end="")
-            try:
-                self._ext_post(f"http://{gfps_ip}:{gfps_port}/api/0/" + endpoint,
-                               {**event.to_json_dict(), "uuid": self.uuid}
-                               )
-            except Exception as e:
-                print(
-                    Fore.LIGHTYELLOW_EX + "GFP->POINT(0x19)" + Fore.RESET + ": creating bucket on gfps" + " For user " + str(
-                        self.uuid), end="\n")
-                bucket = self.get_buckets()[bucket_id]
-                print(json.dumps(bucket,indent=4))
-                self.create_bucket(bucket_id, bucket["type"])
-                
+        logger.debug("heartbeat bucket=%s pulsetime=%s", bucket_id, pulsetime)
+        endpoint = self._heartbeat_endpoints.get((bucket_id, pulsetime))
+        if endpoint is None:
+            endpoint = f"buckets/{bucket_id}/heartbeat?pulsetime={pulsetime}"
+            self._heartbeat_endpoints[(bucket_id, pulsetime)] = endpoint
+        _commit_interval = (
+            timedelta(seconds=commit_interval)
+            if commit_interval
+            else self._commit_interval_td
+        )
+        gfps_url = _gfps_api_url(self._get_settings_cached())
+        # Mirrored to the GFPS server concurrently with the request to
+        # aw-server, so a heartbeat costs one round-trip instead of two.
+        gfps_heartbeat = (
+            self._get_ext_executor().submit(
+                self._gfps_heartbeat,
+                bucket_id,
+                gfps_url + endpoint,
+                {**event.to_json_dict(), "uuid": self.uuid},
+            )
+            if gfps_url
+            else None
+        )
+
+        try:
+            self._heartbeat(
+                bucket_id, event, pulsetime, endpoint, queued, _commit_interval
+            )
+        finally:
+            if gfps_heartbeat is not None:
+                gfps_heartbeat.result()
+
+    def _get_ext_executor(self) -> ThreadPoolExecutor:
+        if self._ext_executor is None:
+            self._ext_executor = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="aw-client-gfps"
+            )
+        return self._ext_executor
+
+    def _gfps_heartbeat(self, bucket_id: str, url: str, data: dict) -> None:
+        logger.debug("gfps heartbeat bucket=%s user=%s", bucket_id, self.uuid)
+        try:
+            self._ext_post(url, data)
+        except Exception:
+            logger.debug(
+                "gfps heartbeat failed, creating bucket=%s user=%s", bucket_id, self.uuid
+            )
+            bucket = self.get_buckets()[bucket_id]
+            self.create_bucket(bucket_id, bucket["type"])
+
+    def _heartbeat(
+        self,
+        bucket_id: str,
+        event: Event,
+        pulsetime: float,
+        endpoint: str,
+        queued: bool,
+        commit_interval: timedelta,
+    ) -> None:
         if queued:
             # Pre-merge heartbeats
             if bucket_id not in self.last_heartbeat:
@@ -308,8 +401,7 @@ class ActivityWatchClient:
             if merge:
                 # If last_heartbeat becomes longer than commit_interval
                 # then commit, else cache merged.
-                diff = (last_heartbeat.duration).total_seconds()
-                if diff >= _commit_interval:
+                if last_heartbeat.duration >= commit_interval:
                     data = merge.to_json_dict()
                     self.request_queue.add_request(endpoint, data)
                     self.last_heartbeat[bucket_id] = event
@@ -327,25 +419,27 @@ class ActivityWatchClient:
     #
 
     def get_buckets(self) -> dict:
-        print(Fore.LIGHTWHITE_EX+"GFP->: Getting buckets ")
-        return self._get("buckets/").json()
-
-    def create_bucket(self, bucket_id: str, event_type: str, queued=False):
-        print(Fore.LIGHTWHITE_EX+"GFP->: Creating bucket " + str(bucket_id) + " " + str(event_type) + " ",end="")
-        # get setting: gfps enabled,get setting: gfps_ip,gfps_port
-        settings = self._get("settings", {}).json()
-        gfps_enabled = False
-        if "gfpsEnabled" in settings:
-            gfps_enabled = settings["gfpsEnabled"]
-        gfps_ip = ""
-        if "gfpsServerIP" in settings:
-            gfps_ip = settings["gfpsServerIP"]
-        gfps_port = ""
-        if "gfpsServerPort" in settings:
-            gfps_port = settings["gfpsServerPort"]
-        if gfps_enabled:
-            print(Fore.LIGHTYELLOW_EX + "GFP->POINT(0x00)"+ Fore.RESET+": creating bucket on gfps" + " For user " + str(self.uuid),end="")
-            self._ext_post(f"http://{gfps_ip}:{gfps_port}/api/0/buckets/{bucket_id}",
+        logger.debug("get_buckets")
+        return _json(self._get("buckets/"))
+
+    def create_bucket(
+        self,
+        bucket_id: str,
+        event_type: str,
+        queued=False,
+        settings: Optional[dict] = None,
+    ):
+        """
+        Args:
+            settings: Server settings to use instead of fetching them, useful when creating many buckets at once
+        """
+        logger.debug("create_bucket bucket=%s type=%s", bucket_id, event_type)
+        if settings is None:
+            settings = self._get_settings_cached()
+        gfps_url = _gfps_api_url(settings)
+        if gfps_url:
+            logger.debug("gfps create_bucket bucket=%s user=%s", bucket_id, self.uuid)
+            self._ext_post(gfps_url + f"buckets/{bucket_id}",
                            {
                                "client": self.client_name,
                                "hostname": self.client_hostname,
@@ -364,7 +458,6 @@ class ActivityWatchClient:
                 "type": event_type,
             }
             self._post(endpoint, data)
-        print()
 
     def delete_bucket(self, bucket_id: str, force: bool = False):
         self._delete(f"buckets/{bucket_id}" + ("?force=1" if force else ""))
@@ -372,10 +465,20 @@ class ActivityWatchClient:
     # Import & export
 
     def export_all(self) -> dict:
-        return self._get("export").json()
+        return _json(self._get("export"))
+
+    def export_all_stream(self) -> Iterator[Tuple[str, dict]]:
+        """
+        Like `export_all`, but yields `(bucket_id, bucket)` pairs while the export is being downloaded,
+        so only one bucket at a time has to be held in memory.
+        """
+        with self._get("export", stream=True) as response:
+            # Let urllib3 undo any content-encoding while ijson reads
+            response.raw.decode_content = True
+            yield from ijson.kvitems(response.raw, "buckets", use_float=True)
 
     def export_bucket(self, bucket_id) -> dict:
-        return self._get(f"buckets/{bucket_id}/export").json()
+        return _json(self._get(f"buckets/{bucket_id}/export"))
 
     def import_bucket(self, bucket: dict) -> None:
         endpoint = "import"
@@ -387,11 +490,16 @@ class ActivityWatchClient:
 
     def query(
         self,
-        query: str,
+        query: Union[str, List[str]],
         timeperiods: List[Tuple[datetime, datetime]],
         name: Optional[str] = None,
         cache: bool = False,
     ) -> List[Any]:
+        """
+        Args:
+            query: The query, either as a string or already split into lines
+            timeperiods: List of (start, end) periods to run the query for, datetimes need to be timezone-aware
+        """
         endpoint = "query/"
         params = {}  # type: Dict[str, Any]
         if cache:
@@ -403,22 +511,20 @@ class ActivityWatchClient:
             params["cache"] = int(cache)
 
         # Check that datetimes have timezone information
-        for start, stop in timeperiods:
-            try:
-                assert _dt_is_tzaware(start)
-                assert _dt_is_tzaware(stop)
-            except AssertionError:
-                raise ValueError("start/stop needs to have a timezone set") from None
+        if not all(
+            _dt_is_tzaware(start) and _dt_is_tzaware(stop)
+            for start, stop in timeperiods
+        ):
+            raise ValueError("start/stop needs to have a timezone set")
 
         data = {
             "timeperiods": [
-                "/".join([start.isoformat(), end.isoformat()])
-                for start, end in timeperiods
+                f"{start.isoformat()}/{end.isoformat()}" for start, end in timeperiods
             ],
-            "query": query.split("\n"),
+            "query": query.split("\n") if isinstance(query, str) else query,
         }
         response = self._post(endpoint, data, params=params)
-        return response.json()
+        return _json(response)
 
     #
     # Settings
@@ -426,12 +532,22 @@ class ActivityWatchClient:
 
     def get_setting(self, key: Optional[str] = None) -> dict:
         if key:
-            return self._get(f"settings/{key}").json()
+            return _json(self._get(f"settings/{key}"))
         else:
-            return self._get("settings").json()
+            return _json(self._get("settings"))
 
     def set_setting(self, key: str, value: str) -> None:
         self._post(f"settings/{key}", value)
+        # Make sure the next heartbeat sees the new value
+        self._settings_cache = None
+
+    def _get_settings_cached(self, ttl: float = 30) -> dict:
+        """Returns all server settings, refetched if the cached copy is older than `ttl` seconds."""
+        now = monotonic()
+        if self._settings_cache is None or now - self._settings_cache_ts >= ttl:
+            self._settings_cache = _json(self._get("settings", {}))
+            self._settings_cache_ts = now
+        return self._settings_cache
 
     #
     #   Connect and disconnect
@@ -452,21 +568,30 @@ class ActivityWatchClient:
         self.request_queue.stop()
         self.request_queue.join()
 
-        # Throw away old thread object, create new one since same thread cannot be started twice
-        self.request_queue = RequestQueue(self)
+        # Closes pooled connections, the sessions reconnect on next use
+        self._session.close()
+        self._ext_session.close()
+        if self._ext_executor is not None:
+            self._ext_executor.shutdown()
+            self._ext_executor = None
+
+        # Throw away old thread object, create new one since same thread cannot be started twice.
+        # The new one takes over the queued requests, so the queue file isn't read again.
+        self.request_queue = RequestQueue(self, previous=self.request_queue)
 
     def wait_for_start(self, timeout: int = 10) -> None:
         """Wait for the server to start by trying to get the server info."""
-        start_time = datetime.now()
+        start_time = monotonic()
         sleep_time = 0.1
-        while (datetime.now() - start_time).seconds < timeout:
+        while monotonic() - start_time < timeout:
             try:
-                self.get_info()
-                self.uuid = self._get("uuid").json()["uuid"]
+                info = self.get_info()
+                # The device_id in the server info is the same id as served by /uuid
+                self.uuid = info.get("device_id") or _json(self._get("uuid"))["uuid"]
                 break
             except req.exceptions.ConnectionError:
                 sleep(sleep_time)
-                sleep_time *= 2
+                sleep_time = min(sleep_time * 2, 1.0)
         else:
             raise Exception(f"Server at {self.server_address} did not start in time")
 
@@ -475,6 +600,41 @@ QueuedRequest = namedtuple("QueuedRequest", ["endpoint", "data"])
 Bucket = namedtuple("Bucket", ["id", "type"])
 
 
+def _pulsetime(endpoint: str) -> Optional[float]:
+    pulsetime = parse_qs(urlsplit(endpoint).query).get("pulsetime")
+    return float(pulsetime[0]) if pulsetime else None
+
+
+def _merge_heartbeat_requests(requests: List[QueuedRequest]) -> List[QueuedRequest]:
+    """
+    Merges consecutive heartbeats to the same endpoint like aw-server would,
+    so that a backlog of queued heartbeats can be sent with fewer requests.
+    """
+    merged = []  # type: List[QueuedRequest]
+    last_event = None  # type: Optional[Event]
+    for request in requests:
+        pulsetime = _pulsetime(request.endpoint)
+        event = None  # type: Optional[Event]
+        if pulsetime is not None:
+            try:
+                event = Event(**request.data)
+            except (TypeError, ValueError):
+                # Send invalid heartbeats unmerged, the server will reject them
+                pass
+            if (
+                last_event is not None
+                and event is not None
+                and merged[-1].endpoint == request.endpoint
+            ):
+                merge = heartbeat_merge(last_event, event, pulsetime)
+                if merge is not None:
+                    merged[-1] = QueuedRequest(request.endpoint, merge.to_json_dict())
+                    continue
+        merged.append(request)
+        last_event = event
+    return merged
+
+
 class RequestQueue(threading.Thread):
     """Used to asynchronously send heartbeats.
 
@@ -483,9 +643,13 @@ class RequestQueue(threading.Thread):
         - Saves all queued requests to file in case of a server crash
     """
 
-    VERSION = 1  # update this whenever the queue-file format changes
+    VERSION = 2  # update this whenever the queue-file format changes
 
-    def __init__(self, client: ActivityWatchClient) -> None:
+    def __init__(
+        self,
+        client: ActivityWatchClient,
+        previous: Optional["RequestQueue"] = None,
+    ) -> None:
         threading.Thread.__init__(self, daemon=True)
 
         self.client = client
@@ -498,45 +662,146 @@ class RequestQueue(threading.Thread):
 
         self._attempt_reconnect_interval = 10
 
+        # The queue is kept in memory and written to the queue file every
+        # commit_interval (and on stop), instead of hitting disk for every request.
+        self._queue_lock = threading.Lock()
+        # Notified whenever a request is added or the queue is stopped
+        self._queue_cond = threading.Condition(self._queue_lock)
+        self._current = []  # type: List[QueuedRequest]
+        self._dirty = False
+        self._persist_interval = self.client.commit_interval
+        self._queue_path = ""  # type: str
+
+        if previous is not None:
+            # Take over the state of a stopped queue
+            self._registered_buckets = previous._registered_buckets
+            self._queue_path = previous._queue_path
+            self._mem_queue = deque(previous._current)
+            self._mem_queue.extend(previous._mem_queue)
+            self._dirty = previous._dirty
+            return
+
         # Setup failed queues file
         data_dir = get_data_dir("aw-client")
         queued_dir = os.path.join(data_dir, "queued")
         if not os.path.exists(queued_dir):
             os.makedirs(queued_dir)
 
-        persistqueue_path = os.path.join(
-            queued_dir,
-            "{}{}.v{}.persistqueue".format(
-                self.client.client_name,
-                "-testing" if client.testing else "",
-                self.VERSION,
-            ),
+        queue_name = "{}{}".format(
+            self.client.client_name, "-testing" if client.testing else ""
+        )
+        self._queue_path = os.path.join(
+            queued_dir, f"{queue_name}.v{self.VERSION}.jsonl"
         )
 
-        logger.debug(f"queue path '{persistqueue_path}'")
+        logger.debug(f"queue path '{self._queue_path}'")
 
-        self._persistqueue = persistqueue.FIFOSQLiteQueue(
-            persistqueue_path, multithreading=True, auto_commit=False
-        )
-        self._current = None  # type: Optional[QueuedRequest]
+        self._mem_queue = deque(self._load_queue())
 
-    def _get_next(self) -> Optional[QueuedRequest]:
-        # self._current will always hold the next not-yet-sent event,
-        # until self._task_done() is called.
-        if not self._current:
+        # Requests left over in the queue of the previous version are older
+        # than any in the current one, so they go first.
+        v1_path = os.path.join(queued_dir, f"{queue_name}.v1.persistqueue")
+        v1_requests = self._load_v1_queue(v1_path)
+        if v1_requests is not None:
+            self._mem_queue.extendleft(reversed(v1_requests))
+            self._dirty = True
+            self._persist()
+            shutil.rmtree(v1_path)
+            logger.info(
+                "Moved %d requests from the old queue at %s",
+                len(v1_requests),
+                v1_path,
+            )
+
+    def _load_queue(self) -> List[QueuedRequest]:
+        requests = []  # type: List[QueuedRequest]
+        if not os.path.exists(self._queue_path):
+            return requests
+        with open(self._queue_path, "rb") as f:
+            for line in f:
+                try:
+                    requests.append(QueuedRequest(**orjson.loads(line)))
+                except (orjson.JSONDecodeError, TypeError):
+                    logger.warning("Skipping invalid line in queue file: %r", line)
+        return requests
+
+    @staticmethod
+    def _load_v1_queue(path: str) -> Optional[List[QueuedRequest]]:
+        """Reads the requests left in a version 1 queue, a persistqueue SQLite queue.
+        Returns None if there is no such queue, or if it can't be read."""
+        db_path = os.path.join(path, "data.db")
+        if not os.path.exists(db_path):
+            return None
+        try:
+            conn = sqlite3.connect(db_path)
             try:
-                self._current = self._persistqueue.get(block=False)
-            except persistqueue.exceptions.Empty:
-                return None
-        return self._current
+                rows = conn.execute(
+                    "SELECT data FROM queue_default ORDER BY _id"
+                ).fetchall()
+            finally:
+                conn.close()
+            return [QueuedRequest(*pickle.loads(row[0])) for row in rows]
+        except Exception:
+            logger.warning(
+                "Could not read the old queue at %s, its requests will not be sent",
+                path,
+                exc_info=True,
+            )
+            return None
+
+    def _persist(self) -> None:
+        """Atomically rewrites the queue file with all requests not yet sent."""
+        with self._queue_lock:
+            if not self._dirty:
+                return
+            requests = self._current + list(self._mem_queue)
+            self._dirty = False
+        tmp_path = self._queue_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for request in requests:
+                f.write(_dumps(request._asdict()) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._queue_path)
+
+    def _persist_loop(self) -> None:
+        while not self.wait(self._persist_interval):
+            self._persist()
+
+    def _get_next(self) -> Optional[QueuedRequest]:
+        # self._current will always hold the not-yet-sent requests of the
+        # current batch, until self._task_done() has been called for each.
+        with self._queue_lock:
+            if not self._current:
+                # Drained and assigned under one lock, so that a concurrent
+                # _persist() never sees the batch in neither place.
+                self._current = self._drain_batch()
+            return self._current[0] if self._current else None
 
     def _task_done(self) -> None:
-        self._current = None
-        self._persistqueue.task_done()
+        with self._queue_lock:
+            self._current.pop(0)
+            self._dirty = True
+
+    def _drain_batch(self, max_items: int = 100) -> List[QueuedRequest]:
+        """Gets up to `max_items` queued requests, with consecutive mergeable heartbeats merged.
+
+        Must be called with self._queue_lock held."""
+        batch = [
+            self._mem_queue.popleft()
+            for _ in range(min(max_items, len(self._mem_queue)))
+        ]
+        return _merge_heartbeat_requests(batch)
 
     def _create_buckets(self) -> None:
+        if not self._registered_buckets:
+            return
+        existing = self.client.get_buckets()
+        settings = self.client._get_settings_cached()
         for bucket in self._registered_buckets:
-            self.client.create_bucket(bucket.id, bucket.type)
+            if bucket.id in existing and existing[bucket.id]["type"] == bucket.type:
+                continue
+            self.client.create_bucket(bucket.id, bucket.type, settings=settings)
 
     def _try_connect(self) -> bool:
         try:  # Try to connect
@@ -559,7 +824,11 @@ class RequestQueue(threading.Thread):
     def _dispatch_request(self) -> None:
         request = self._get_next()
         if not request:
-            self.wait(0.2)  # seconds to wait before re-polling the empty queue
+            with self._queue_cond:
+                self._queue_cond.wait_for(
+                    lambda: self._mem_queue or self.should_stop(),
+                    timeout=self._attempt_reconnect_interval,
+                )
             return
 
         try:
@@ -603,11 +872,13 @@ class RequestQueue(threading.Thread):
 
     def run(self) -> None:
         self._stop_event.clear()
+        persist_thread = threading.Thread(target=self._persist_loop, daemon=True)
+        persist_thread.start()
         while not self.should_stop():
             # Connect
             while not self._try_connect():
                 logger.warning(
-                    f"Not connected to server, {self._persistqueue.qsize()} requests in queue"
+                    f"Not connected to server, {len(self._mem_queue)} requests in queue"
                 )
                 if self.wait(self._attempt_reconnect_interval):
                     break
@@ -616,8 +887,13 @@ class RequestQueue(threading.Thread):
             while self.connected and not self.should_stop():
                 self._dispatch_request()
 
+        persist_thread.join()
+        self._persist()
+
     def stop(self) -> None:
         self._stop_event.set()
+        with self._queue_cond:
+            self._queue_cond.notify_all()
 
     def add_request(self, endpoint: str, data: dict) -> None:
         """
@@ -626,7 +902,10 @@ class RequestQueue(threading.Thread):
         """
         assert "/heartbeat" in endpoint
         assert isinstance(data, dict)
-        self._persistqueue.put(QueuedRequest(endpoint, data))
+        with self._queue_cond:
+            self._mem_queue.append(QueuedRequest(endpoint, data))
+            self._dirty = True
+            self._queue_cond.notify()
 
     def register_bucket(self, bucket_id: str, event_type: str) -> None:
         self._registered_buckets.append(Bucket(bucket_id, event_type))
@@ -7,20 +7,36 @@ It is said about testing that it makes you able to refactorize
 with confidence, and I need some of that right now.
 """
 
+import os
+import pickle
+import sqlite3
 from time import sleep
+from datetime import datetime, timedelta, timezone
 from logging import basicConfig, DEBUG
 
 basicConfig(level=DEBUG)
 
+import pytest
 import requests
-from aw_client.client import RequestQueue
+from aw_core.models import Event
+from aw_client import client as aw_client_module
+from aw_client.client import QueuedRequest, RequestQueue
+
+
+@pytest.fixture(autouse=True)
+def queue_dir(tmp_path, monkeypatch):
+    # Keep queue files out of the user's real data dir
+    monkeypatch.setattr(aw_client_module, "get_data_dir", lambda _: str(tmp_path))
+    return tmp_path
 
 
 class MockClient:
     client_name = "Mock"
+    commit_interval = 10
 
     def __init__(self):
         self.testing = True
+        self.posted = []
 
     def get_buckets(self, *args, **kwargs):
         print("Called get_buckets")
@@ -31,6 +47,7 @@ class MockClient:
 
     def _post(self, *args, **kwargs):
         print(args, kwargs)
+        self.posted.append(args)
         return requests.Response()
 
 
@@ -60,3 +77,128 @@ def test_complex():
     sleep(1)
     rq.stop()
     rq.join()
+
+
+def test_merge_queued_heartbeats():
+    client = MockClient()
+    rq = RequestQueue(client)  # type: ignore
+
+    # Mockeypatching
+    rq._try_connect = lambda: True  # type: ignore
+    rq.connected = True
+
+    now = datetime.now(timezone.utc)
+    endpoint = "buckets/test/heartbeat?pulsetime=2"
+    for i in range(3):
+        e = Event(timestamp=now + timedelta(seconds=i), data={"label": "a"})
+        rq.add_request(endpoint, e.to_json_dict())
+    e = Event(timestamp=now + timedelta(seconds=3), data={"label": "b"})
+    rq.add_request(endpoint, e.to_json_dict())
+
+    rq.start()
+    sleep(1)
+    rq.stop()
+    rq.join()
+
+    assert len(client.posted) == 2
+    assert client.posted[0][1]["duration"] == 2
+    assert client.posted[1][1]["data"] == {"label": "b"}
+
+
+def test_persist_queue():
+    client = MockClient()
+    rq = RequestQueue(client)  # type: ignore
+
+    # Mockeypatching
+    rq._try_connect = lambda: False  # type: ignore
+
+    rq.add_request("buckets/test/heartbeat?pulsetime=1", {"data": {"label": "a"}})
+    rq.start()
+    rq.stop()
+    rq.join()
+
+    # Requests that were never sent should be loaded by the next queue
+    rq = RequestQueue(client)  # type: ignore
+    assert len(rq._mem_queue) == 1
+    assert rq._mem_queue[0].data == {"data": {"label": "a"}}
+
+
+def test_restart_queue():
+    client = MockClient()
+    rq = RequestQueue(client)  # type: ignore
+
+    # Mockeypatching
+    rq._try_connect = lambda: False  # type: ignore
+
+    rq.register_bucket("test", "test")
+    rq.add_request("buckets/test/heartbeat?pulsetime=1", {"data": {"label": "a"}})
+    rq.start()
+    rq.stop()
+    rq.join()
+
+    # A restarted queue keeps the unsent requests and registered buckets
+    rq = RequestQueue(client, previous=rq)  # type: ignore
+    assert len(rq._mem_queue) == 1
+    assert rq._registered_buckets == [("test", "test")]
+
+
+def test_merge_invalid_queued_heartbeat():
+    client = MockClient()
+    rq = RequestQueue(client)  # type: ignore
+
+    # Mockeypatching
+    rq._try_connect = lambda: True  # type: ignore
+    rq.connected = True
+
+    now = datetime.now(timezone.utc)
+    endpoint = "buckets/test/heartbeat?pulsetime=2"
+    rq.add_request(endpoint, {"timestamp": now.isoformat(), "data": {}, "uuid": "u"})
+    e = Event(timestamp=now, data={"label": "a"})
+    rq.add_request(endpoint, e.to_json_dict())
+
+    rq.start()
+    sleep(1)
+    rq.stop()
+    rq.join()
+
+    # The invalid heartbeat is sent as-is instead of killing the queue thread
+    assert len(client.posted) == 2
+    assert "uuid" in client.posted[0][1]
+    assert client.posted[1][1]["data"] == {"label": "a"}
+
+
+def test_migrate_v1_queue(queue_dir):
+    # Version 1 queues were persistqueue SQLite queues of pickled requests
+    v1_path = queue_dir / "queued" / "Mock-testing.v1.persistqueue"
+    os.makedirs(v1_path)
+    conn = sqlite3.connect(v1_path / "data.db")
+    conn.execute(
+        "CREATE TABLE queue_default (_id INTEGER PRIMARY KEY AUTOINCREMENT, data BLOB, timestamp FLOAT)"
+    )
+    for label in ["a", "b"]:
+        request = QueuedRequest("buckets/test/heartbeat?pulsetime=1", {"label": label})
+        conn.execute(
+            "INSERT INTO queue_default (data, timestamp) VALUES (?, 0)",
+            (pickle.dumps(request),),
+        )
+    conn.commit()
+    conn.close()
+
+    client = MockClient()
+    rq = RequestQueue(client)  # type: ignore
+    rq.add_request("buckets/test/heartbeat?pulsetime=1", {"label": "c"})
+
+    assert [r.data["label"] for r in rq._mem_queue] == ["a", "b", "c"]
+    assert not v1_path.exists()
+    # Moved to the new queue file right away
+    assert len(RequestQueue(client)._mem_queue) == 2  # type: ignore
+
+
+def test_persist_non_str_keys():
+    client = MockClient()
+    rq = RequestQueue(client)  # type: ignore
+    rq.add_request("buckets/test/heartbeat?pulsetime=1", {"data": {1: "a"}})
+    rq._persist()
+
+    rq = RequestQueue(client)  # type: ignore
+    assert rq._mem_queue[0].data == {"data": {"1": "a"}}
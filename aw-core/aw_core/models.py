@@ -6,6 +6,7 @@ from datetime import datetime, timedelta, timezone
 from typing import (
     Any,
     Dict,
+    List,
     Optional,
     Union,
 )
@@ -67,6 +68,28 @@ class Event(dict):
         self.duration = duration  # type: ignore
         self.data = data or {}
 
+    @classmethod
+    def from_dicts(cls, raw: List[Dict[str, Any]]) -> List["Event"]:
+        """Creates events from a list of dicts, such as those produced by `to_json_dict`.
+        Faster than `[Event(**e) for e in raw]` for large lists."""
+        events = []
+        for e in raw:
+            timestamp = e.get("timestamp")
+            if timestamp is None:
+                # Let the initializer warn about, and default, the missing timestamp
+                events.append(
+                    cls(id=e.get("id"), duration=e.get("duration", 0), data=e.get("data"))
+                )
+                continue
+            # Bypasses __init__ and the property setters, which parse the timestamp twice
+            event = cls.__new__(cls)
+            event["id"] = e.get("id")
+            event["timestamp"] = _timestamp_parse(timestamp).astimezone(timezone.utc)
+            event.duration = e.get("duration", 0)  # type: ignore
+            event["data"] = e.get("data") or {}
+            events.append(event)
+        return events
+
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Event):
             return (
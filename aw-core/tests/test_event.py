@@ -27,6 +27,17 @@ def test_json_serialization() -> None:
     assert e == Event(**json.loads(e.to_json_str()))
 
 
+def test_from_dicts() -> None:
+    events = [
+        Event(id=i, timestamp=now + i * td1s, duration=td1s, data={"key": i})
+        for i in range(3)
+    ]
+    from_dicts = Event.from_dicts([e.to_json_dict() for e in events])
+    assert from_dicts == events
+    assert [e.id for e in from_dicts] == [e.id for e in events]
+    assert from_dicts[0].to_json_dict() == events[0].to_json_dict()
+
+
 def test_set_invalid_duration() -> None:
     e = Event()
     with pytest.raises(TypeError):
@@ -1,4 +1,5 @@
 import functools
+import itertools
 import json
 import logging
 from datetime import datetime
@@ -7,8 +8,10 @@ from socket import gethostname
 from typing import (
     Any,
     Dict,
+    Iterator,
     List,
     Optional,
+    Tuple,
 )
 from uuid import uuid4
 
@@ -26,6 +29,7 @@ from .settings import Settings
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
 def get_device_id() -> str:
     path = Path(get_data_dir("aw-server")) / "device_id"
     if path.exists():
@@ -48,12 +52,34 @@ def check_bucket_exists(f):
     return g
 
 
+def modifies_buckets(f):
+    """Marks a method that changes buckets or events, bumping the buckets version"""
+
+    @functools.wraps(f)
+    def g(self, *args, **kwargs):
+        try:
+            return f(self, *args, **kwargs)
+        finally:
+            # Bumped even on failure, since the change may have been partially applied
+            self._buckets_version = next(self._buckets_version_counter)
+
+    return g
+
+
 class ServerAPI:
     def __init__(self, db, testing) -> None:
         self.db = db
         self.settings = Settings(testing)
         self.testing = testing
         self.last_event = {}  # type: dict
+        # Unique per instance, so versions from before a restart never match
+        self._instance_id = uuid4().hex
+        self._buckets_version_counter = itertools.count(1)
+        self._buckets_version = 0
+
+    def get_buckets_version(self) -> str:
+        """Returns a string that changes whenever a bucket or its events change"""
+        return f"{self._instance_id}-{self._buckets_version}"
 
     def get_info(self) -> Dict[str, Any]:
         """Get server info"""
@@ -96,15 +122,16 @@ class ServerAPI:
 
     def export_all(self) -> Dict[str, Any]:
         """Exports all buckets and their events to a format consistent across versions"""
-        buckets = self.get_buckets()
-        exported_buckets = {}
-        for bid in buckets.keys():
-            exported_buckets[bid] = self.export_bucket(bid)
-        return exported_buckets
+        return dict(self.iter_export_all())
+
+    def iter_export_all(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Like export_all, but yields (bucket_id, bucket) pairs, exporting one bucket at a time"""
+        for bid in self.db.buckets().keys():
+            yield bid, self.export_bucket(bid)
 
     def import_bucket(self, bucket_data: Any):
         bucket_id = bucket_data["id"]
-        logger.info(f"Importing bucket {bucket_id}")
+        logger.info("Importing bucket %s", bucket_id)
 
         # TODO: Check that bucket doesn't already exist
         self.db.create_bucket(
@@ -134,6 +161,7 @@ class ServerAPI:
         for bid, bucket in buckets.items():
             self.import_bucket(bucket)
 
+    @modifies_buckets
     def create_bucket(
         self,
         bucket_id: str,
@@ -171,6 +199,7 @@ class ServerAPI:
         )
         return True
 
+    @modifies_buckets
     @check_bucket_exists
     def update_bucket(
         self,
@@ -190,11 +219,12 @@ class ServerAPI:
         )
         return None
 
+    @modifies_buckets
     @check_bucket_exists
     def delete_bucket(self, bucket_id: str) -> None:
         """Delete a bucket"""
         self.db.delete_bucket(bucket_id)
-        logger.debug(f"Deleted bucket '{bucket_id}'")
+        logger.debug("Deleted bucket '%s'", bucket_id)
         return None
 
     @check_bucket_exists
@@ -205,7 +235,7 @@ class ServerAPI:
     ) -> Optional[Event]:
         """Get a single event from a bucket"""
         logger.debug(
-            f"Received get request for event {event_id} in bucket '{bucket_id}'"
+            "Received get request for event %s in bucket '%s'", event_id, bucket_id
         )
         event = self.db[bucket_id].get_by_id(event_id)
         return event.to_json_dict() if event else None
@@ -219,14 +249,26 @@ class ServerAPI:
         end: Optional[datetime] = None,
     ) -> List[Event]:
         """Get events from a bucket"""
-        logger.debug(f"Received get request for events in bucket '{bucket_id}'")
+        return [
+            event.to_json_dict()
+            for event in self.get_raw_events(bucket_id, limit, start, end)
+        ]
+
+    @check_bucket_exists
+    def get_raw_events(
+        self,
+        bucket_id: str,
+        limit: int = -1,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Event]:
+        """Like get_events, but returns the Event objects instead of JSON dicts"""
+        logger.debug("Received get request for events in bucket '%s'", bucket_id)
         if limit is None:  # Let limit = None also mean "no limit"
             limit = -1
-        events = [
-            event.to_json_dict() for event in self.db[bucket_id].get(limit, start, end)
-        ]
-        return events
+        return self.db[bucket_id].get(limit, start, end)
 
+    @modifies_buckets
     @check_bucket_exists
     def create_events(self, bucket_id: str, events: List[Event]) -> Optional[Event]:
         """Create events for a bucket. Can handle both single events and multiple ones.
@@ -242,14 +284,16 @@ class ServerAPI:
         end: Optional[datetime] = None,
     ) -> int:
         """Get eventcount from a bucket"""
-        logger.debug(f"Received get request for eventcount in bucket '{bucket_id}'")
+        logger.debug("Received get request for eventcount in bucket '%s'", bucket_id)
         return self.db[bucket_id].get_eventcount(start, end)
 
+    @modifies_buckets
     @check_bucket_exists
     def delete_event(self, bucket_id: str, event_id) -> bool:
         """Delete a single event from a bucket"""
         return self.db[bucket_id].delete(event_id)
 
+    @modifies_buckets
     @check_bucket_exists
     def heartbeat(self, bucket_id: str, heartbeat: Event, pulsetime: float) -> Event:
         """
@@ -274,13 +318,12 @@ class ServerAPI:
         Inspired by: https://wakatime.com/developers#heartbeats
         """
         logger.debug(
-            "Received heartbeat in bucket '{}'\n\ttimestamp: {}, duration: {}, pulsetime: {}\n\tdata: {}".format(
-                bucket_id,
-                heartbeat.timestamp,
-                heartbeat.duration,
-                pulsetime,
-                heartbeat.data,
-            )
+            "Received heartbeat in bucket '%s'\n\ttimestamp: %s, duration: %s, pulsetime: %s\n\tdata: %s",
+            bucket_id,
+            heartbeat.timestamp,
+            heartbeat.duration,
+            pulsetime,
+            heartbeat.data,
         )
 
         # The endtime here is set such that in the event that the heartbeat is older than an
@@ -299,39 +342,32 @@ class ServerAPI:
                 last_event = last_events[0]
         else:
             last_event = self.last_event[bucket_id]
-        print("last_event",last_event)
         if last_event:
             if last_event.data == heartbeat.data:
                 merged = heartbeat_merge(last_event, heartbeat, pulsetime)
                 if merged is not None:
                     # Heartbeat was merged into last_event
                     logger.debug(
-                        "Received valid heartbeat, merging. (bucket: {})".format(
-                            bucket_id
-                        )
+                        "Received valid heartbeat, merging. (bucket: %s)", bucket_id
                     )
                     self.last_event[bucket_id] = merged
                     self.db[bucket_id].replace_last(merged)
                     return merged
                 else:
                     logger.info(
-                        "Received heartbeat after pulse window, inserting as new event. (bucket: {})".format(
-                            bucket_id
-                        )
+                        "Received heartbeat after pulse window, inserting as new event. (bucket: %s)",
+                        bucket_id,
                     )
             else:
                 logger.debug(
-                    "Received heartbeat with differing data, inserting as new event. (bucket: {})".format(
-                        bucket_id
-                    )
+                    "Received heartbeat with differing data, inserting as new event. (bucket: %s)",
+                    bucket_id,
                 )
         else:
             logger.info(
-                "Received heartbeat, but bucket was previously empty, inserting as new event. (bucket: {})".format(
-                    bucket_id
-                )
+                "Received heartbeat, but bucket was previously empty, inserting as new event. (bucket: %s)",
+                bucket_id,
             )
-        print(heartbeat)
         self.db[bucket_id].insert(heartbeat)
         self.last_event[bucket_id] = heartbeat
         return heartbeat
@@ -1,27 +1,46 @@
-import json
-import traceback
-from functools import wraps
-from threading import Lock
-from typing import Dict
+import hashlib
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, wraps
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
 
 import iso8601
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 from aw_core import schema
 from aw_core.models import Event
 from aw_query.exceptions import QueryException
 from flask import (
     Blueprint,
+    Response,
     current_app,
     jsonify,
     make_response,
     request,
+    stream_with_context,
 )
 from flask_restx import Api, Resource, fields
 
 from . import logger
 from .api import ServerAPI, get_device_id
-from .exceptions import BadRequest, Unauthorized
+from .exceptions import BadRequest, Unauthorized, UnsupportedMediaType
+
+
+_LOCAL_HOSTS = frozenset(("localhost", "127.0.0.1"))
+_EVENT_KEYS = frozenset(("id", "timestamp", "duration", "data"))
+
+T = TypeVar("T")
+
+# One lock per bucket, so heartbeats to different buckets don't wait on each other.
+# Module-level, since flask-restx creates a new Resource instance for every request.
+# Entries are removed when their bucket is deleted.
+_heartbeat_locks: Dict[str, Lock] = {}
+_heartbeat_locks_mu = Lock()
 
 
 def host_header_check(f):
@@ -33,22 +52,123 @@ def host_header_check(f):
 
     @wraps(f)
     def decorator(*args, **kwargs):
-        server_host = current_app.config["HOST"]
+        # Computed once per app, since this runs on every request.
+        # Empty if the check is disabled.
+        allowed_hosts = current_app.extensions.get("aw_allowed_hosts")
+        if allowed_hosts is None:
+            server_host = current_app.config["HOST"]
+            allowed_hosts = (
+                frozenset()
+                if server_host == "0.0.0.0"
+                else _LOCAL_HOSTS | {server_host}
+            )
+            current_app.extensions["aw_allowed_hosts"] = allowed_hosts
+
         req_host = request.headers.get("host", None)
-        if server_host == "0.0.0.0":
+        if not allowed_hosts:
             logger.warning(
                 "Server is listening on 0.0.0.0, host header check is disabled (potential security issue)."
             )
         elif req_host is None:
             return {"message": "host header is missing"}, 400
-        else:
-            if req_host.split(":")[0] not in ["localhost", "127.0.0.1", server_host]:
-                return {"message": f"host header is invalid (was {req_host})"}, 400
+        elif req_host.partition(":")[0] not in allowed_hosts:
+            return {"message": f"host header is invalid (was {req_host})"}, 400
         return f(*args, **kwargs)
 
     return decorator
 
 
+def etag_cached(f):
+    """
+    Tags responses with an ETag derived from the buckets version, and answers
+    304 Not Modified without calling the handler if the client's copy is current.
+    """
+
+    @wraps(f)
+    def decorator(*args, **kwargs):
+        version = current_app.api.get_buckets_version()
+        etag = hashlib.blake2b(version.encode(), digest_size=8).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = make_response(f(*args, **kwargs))
+        # Weak, since the body may be sent with different content encodings
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, max-age=0, must-revalidate"
+        return response
+
+    return decorator
+
+
+def _fast_json():
+    """
+    Parses the request body as JSON with orjson.
+
+    Used instead of request.get_json() to parse the raw body once, without
+    keeping a cached copy of the body.
+    """
+    # Like request.get_json(), only accept JSON bodies. Other content types, like
+    # text/plain, can be sent cross-origin without a CORS preflight.
+    if not request.is_json:
+        raise UnsupportedMediaType(
+            "UnsupportedMediaType", "Request body must be of type application/json"
+        )
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError as e:
+        raise BadRequest("InvalidJSON", f"Failed to decode JSON body: {e}") from e
+
+
+def _dumps_events(events: List[Event]) -> bytes:
+    """
+    Serializes events to the same JSON as their to_json_dict(), in a single pass.
+
+    orjson encodes the Event dicts and their (UTC) timestamps natively,
+    so only the durations need converting.
+    """
+    return orjson.dumps(events, default=_duration_seconds)
+
+
+def _duration_seconds(obj) -> float:
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso(s: str) -> datetime:
+    """
+    Parses an ISO8601 timestamp from a query parameter.
+
+    Clients tend to poll with the same start/end boundaries, so results are cached.
+    Uses the stdlib parser where possible and falls back to iso8601 for the
+    formats it rejects. Like iso8601, naive timestamps are assumed to be UTC.
+    """
+    try:
+        dt = datetime.fromisoformat(s[:-1] + "+00:00" if s.endswith("Z") else s)
+    except ValueError:
+        return iso8601.parse_date(s)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _arg(name: str, type: Callable[[str], T], default: Optional[T] = None) -> Optional[T]:
+    """
+    Reads and converts a query parameter, returning default if it's missing.
+
+    Unlike request.args.get(name, type=...), values that fail to convert are
+    reported as a BadRequest instead of being treated as missing.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return type(value)
+    except ValueError as e:
+        raise BadRequest(
+            "InvalidParameter", f"Invalid value for parameter {name}: {value!r}"
+        ) from e
+
+
 blueprint = Blueprint("api", __name__, url_prefix="/api")
 api = Api(blueprint, doc="/", decorators=[host_header_check])
 
@@ -120,10 +240,10 @@ def copy_doc(api_method):
 
 @api.route("/0/info")
 class InfoResource(Resource):
-    @api.marshal_with(info)
+    @api.doc(model=info)
     @copy_doc(ServerAPI.get_info)
-    def get(self) -> Dict[str, Dict]:
-        return current_app.api.get_info()
+    def get(self) -> Response:
+        return jsonify(current_app.api.get_info())
 
 
 # BUCKETS
@@ -133,8 +253,9 @@ class InfoResource(Resource):
 class BucketsResource(Resource):
     # TODO: Add response marshalling/validation
     @copy_doc(ServerAPI.get_buckets)
-    def get(self) -> Dict[str, Dict]:
-        return current_app.api.get_buckets()
+    @etag_cached
+    def get(self) -> Response:
+        return jsonify(current_app.api.get_buckets())
 
 
 @api.route("/0/buckets/<string:bucket_id>")
@@ -147,7 +268,7 @@ class BucketResource(Resource):
     @api.expect(create_bucket)
     @copy_doc(ServerAPI.create_bucket)
     def post(self, bucket_id):
-        data = request.get_json()
+        data = _fast_json()
         bucket_created = current_app.api.create_bucket(
             bucket_id,
             event_type=data["type"],
@@ -162,7 +283,7 @@ class BucketResource(Resource):
     @api.expect(update_bucket)
     @copy_doc(ServerAPI.update_bucket)
     def put(self, bucket_id):
-        data = request.get_json()
+        data = _fast_json()
         current_app.api.update_bucket(
             bucket_id,
             event_type=data["type"],
@@ -182,6 +303,8 @@ class BucketResource(Resource):
                 raise Unauthorized("DeleteBucketUnauthorized", msg)
 
         current_app.api.delete_bucket(bucket_id)
+        with _heartbeat_locks_mu:
+            _heartbeat_locks.pop(bucket_id, None)
         return {}, 200
 
 
@@ -199,33 +322,42 @@ class EventsResource(Resource):
     @api.param("end", "End date of events")
     @copy_doc(ServerAPI.get_events)
     def get(self, bucket_id):
-        args = request.args
-        limit = int(args["limit"]) if "limit" in args else -1
-        start = iso8601.parse_date(args["start"]) if "start" in args else None
-        end = iso8601.parse_date(args["end"]) if "end" in args else None
+        limit = _arg("limit", int, -1)
+        start = _arg("start", _parse_iso)
+        end = _arg("end", _parse_iso)
 
-        events = current_app.api.get_events(
+        events = current_app.api.get_raw_events(
             bucket_id, limit=limit, start=start, end=end
         )
-        return events, 200
+        # Serialized here, since flask-restx would re-encode the list with stdlib json
+        return Response(_dumps_events(events), mimetype="application/json")
 
     # TODO: How to tell expect that it could be a list of events? Until then we can't use validate.
     @api.expect(event)
     @copy_doc(ServerAPI.create_events)
     def post(self, bucket_id):
-        data = request.get_json()
+        data = _fast_json()
         logger.debug(
-            "Received post request for event in bucket '{}' and data: {}".format(
-                bucket_id, data
-            )
+            "Received post request for event in bucket '%s' and data: %s",
+            bucket_id,
+            data,
         )
 
         if isinstance(data, dict):
-            events = [Event(**data)]
-        elif isinstance(data, list):
-            events = [Event(**e) for e in data]
-        else:
+            data = [data]
+        elif not isinstance(data, list):
             raise BadRequest("Invalid POST data", "")
+        # Rejected like HeartbeatResource.post does, since from_dicts ignores unknown keys
+        for e in data:
+            if not isinstance(e, dict) or not _EVENT_KEYS.issuperset(e):
+                raise BadRequest(
+                    "InvalidEvent",
+                    "Events must be objects with only id, timestamp, duration and data",
+                )
+        try:
+            events = Event.from_dicts(data)
+        except (TypeError, ValueError) as e:
+            raise BadRequest("InvalidEvent", f"Invalid event: {e}") from e
 
         event = current_app.api.create_events(bucket_id, events)
         return event.to_json_dict() if event else None, 200
@@ -238,9 +370,8 @@ class EventCountResource(Resource):
     @api.param("end", "End date of eventcount")
     @copy_doc(ServerAPI.get_eventcount)
     def get(self, bucket_id):
-        args = request.args
-        start = iso8601.parse_date(args["start"]) if "start" in args else None
-        end = iso8601.parse_date(args["end"]) if "end" in args else None
+        start = _arg("start", _parse_iso)
+        end = _arg("end", _parse_iso)
 
         events = current_app.api.get_eventcount(bucket_id, start=start, end=end)
         return events, 200
@@ -252,7 +383,9 @@ class EventResource(Resource):
     @copy_doc(ServerAPI.get_event)
     def get(self, bucket_id: str, event_id: int):
         logger.debug(
-            f"Received get request for event with id '{event_id}' in bucket '{bucket_id}'"
+            "Received get request for event with id '%s' in bucket '%s'",
+            event_id,
+            bucket_id,
         )
         event = current_app.api.get_event(bucket_id, event_id)
         if event:
@@ -263,9 +396,9 @@ class EventResource(Resource):
     @copy_doc(ServerAPI.delete_event)
     def delete(self, bucket_id: str, event_id: int):
         logger.debug(
-            "Received delete request for event with id '{}' in bucket '{}'".format(
-                event_id, bucket_id
-            )
+            "Received delete request for event with id '%s' in bucket '%s'",
+            event_id,
+            bucket_id,
         )
         success = current_app.api.delete_event(bucket_id, event_id)
         return {"success": success}, 200
@@ -273,27 +406,36 @@ class EventResource(Resource):
 
 @api.route("/0/buckets/<string:bucket_id>/heartbeat")
 class HeartbeatResource(Resource):
-    def __init__(self, *args, **kwargs):
-        self.lock = Lock()
-        super().__init__(*args, **kwargs)
-
-    @api.expect(event, validate=True)
+    # Not validated against the schema, that's too costly to do on every heartbeat.
+    # The checks below and the Event constructor reject malformed heartbeats instead.
+    @api.expect(event)
     @api.param(
         "pulsetime", "Largest timewindow allowed between heartbeats for them to merge"
     )
     @copy_doc(ServerAPI.heartbeat)
     def post(self, bucket_id):
-        heartbeat = Event(**request.get_json())
+        data = _fast_json()
+        if not isinstance(data, dict) or not isinstance(data.get("timestamp"), str):
+            raise BadRequest(
+                "InvalidEvent", "Heartbeat must be an object with a timestamp string"
+            )
+        if not isinstance(data.get("data", {}), dict):
+            raise BadRequest("InvalidEvent", "Heartbeat data must be an object")
+        try:
+            heartbeat = Event(**data)
+        except (TypeError, ValueError) as e:
+            raise BadRequest("InvalidEvent", f"Invalid heartbeat: {e}") from e
 
-        if "pulsetime" in request.args:
-            pulsetime = float(request.args["pulsetime"])
-        else:
+        pulsetime = _arg("pulsetime", float)
+        if pulsetime is None:
             raise BadRequest("MissingParameter", "Missing required parameter pulsetime")
 
-        # This lock is meant to ensure that only one heartbeat is processed at a time,
+        # This lock is meant to ensure that only one heartbeat per bucket is processed at a time,
         # as the heartbeat function is not thread-safe.
         # This should maybe be moved into the api.py file instead (but would be very messy).
-        aquired = self.lock.acquire(timeout=1)
+        with _heartbeat_locks_mu:
+            lock = _heartbeat_locks.setdefault(bucket_id, Lock())
+        aquired = lock.acquire(timeout=1)
         if not aquired:
             logger.warning(
                 "Heartbeat lock could not be aquired within a reasonable time, this likely indicates a bug."
@@ -301,7 +443,8 @@ class HeartbeatResource(Resource):
         try:
             event = current_app.api.heartbeat(bucket_id, heartbeat, pulsetime)
         finally:
-            self.lock.release()
+            if aquired:
+                lock.release()
         return event.to_json_dict(), 200
 
 
@@ -317,33 +460,70 @@ class QueryResource(Resource):
         name = ""
         if "name" in request.args:
             name = request.args["name"]
-        query = request.get_json()
+        query = _fast_json()
         try:
             result = current_app.api.query2(
                 name, query["query"], query["timeperiods"], False
             )
             return jsonify(result)
         except QueryException as qe:
-            traceback.print_exc()
+            # Usually a mistake in the user's query, so the stack trace isn't of interest
+            logger.warning("Query failed: %s", qe)
             return {"type": type(qe).__name__, "message": str(qe)}, 400
 
 
 # EXPORT AND IMPORT
 
 
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _export_response(chunks: Iterable[bytes], filename: str) -> Response:
+    """
+    Builds an export download from the encoded JSON chunks.
+
+    The body is gzipped while it's being sent if the client accepts it, exports
+    are very repetitive JSON and usually compress to a fraction of their size.
+    """
+    gzipped = request.accept_encodings["gzip"] > 0
+    response = Response(
+        _gzip_chunks(chunks) if gzipped else chunks, mimetype="application/json"
+    )
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    response.headers["Content-Disposition"] = "attachment; filename={}".format(
+        filename
+    )
+    return response
+
+
 @api.route("/0/export")
 class ExportAllResource(Resource):
     @api.doc(model=buckets_export)
     @copy_doc(ServerAPI.export_all)
+    @etag_cached
     def get(self):
-        buckets_export = current_app.api.export_all()
-        payload = {"buckets": buckets_export}
-        response = make_response(json.dumps(payload))
-        filename = "aw-buckets-export.json"
-        response.headers["Content-Disposition"] = "attachment; filename={}".format(
-            filename
+        # Buckets are exported and encoded one at a time while the response is sent,
+        # the output is identical to encoding {"buckets": export_all()} in one go.
+        def generate():
+            yield b'{"buckets":{'
+            for i, (bid, bucket) in enumerate(current_app.api.iter_export_all()):
+                if i:
+                    yield b","
+                yield orjson.dumps(bid) + b":"
+                yield orjson.dumps(bucket, option=orjson.OPT_NON_STR_KEYS)
+            yield b"}}"
+
+        return _export_response(
+            stream_with_context(generate()), "aw-buckets-export.json"
         )
-        return response
 
 
 # TODO: Perhaps we don't need this, could be done with a query argument to /0/export instead
@@ -351,15 +531,14 @@ class ExportAllResource(Resource):
 class BucketExportResource(Resource):
     @api.doc(model=buckets_export)
     @copy_doc(ServerAPI.export_bucket)
+    @etag_cached
     def get(self, bucket_id):
         bucket_export = current_app.api.export_bucket(bucket_id)
         payload = {"buckets": {bucket_export["id"]: bucket_export}}
-        response = make_response(json.dumps(payload))
-        filename = "aw-bucket-export_{}.json".format(bucket_export["id"])
-        response.headers["Content-Disposition"] = "attachment; filename={}".format(
-            filename
+        return _export_response(
+            [orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)],
+            "aw-bucket-export_{}.json".format(bucket_export["id"]),
         )
-        return response
 
 
 @api.route("/0/import")
@@ -372,11 +551,11 @@ class ImportAllResource(Resource):
             # web-ui form only allows one file, but technically it's possible to
             # upload multiple files at the same time
             for filename, f in request.files.items():
-                buckets = json.loads(f.stream.read())["buckets"]
+                buckets = orjson.loads(f.stream.read())["buckets"]
                 current_app.api.import_all(buckets)
         # Normal import from body
         else:
-            buckets = request.get_json()["buckets"]
+            buckets = _fast_json()["buckets"]
             current_app.api.import_all(buckets)
         return None, 200
 
@@ -388,7 +567,7 @@ class ImportAllResource(Resource):
 class LogResource(Resource):
     @copy_doc(ServerAPI.get_log)
     def get(self):
-        return current_app.api.get_log(), 200
+        return jsonify(current_app.api.get_log())
 
 
 # SETTINGS
@@ -404,58 +583,100 @@ class SettingsResource(Resource):
     def post(self, key: str):
         if not key:
             raise BadRequest("MissingParameter", "Missing required parameter key")
-        data = current_app.api.set_setting(key, request.get_json())
+        data = current_app.api.set_setting(key, _fast_json())
+        if key.startswith("gfps"):
+            current_app.extensions.pop("aw_gfps_addr", None)
         return data
 
 @api.route("/0/uuid")
 class UUIDResource(Resource):
     def get(self):
-        return {"uuid": get_device_id()},200
+        return jsonify({"uuid": get_device_id()})
+
+
+# GFPS
+
+# Shared session, so proxied requests reuse connections to the GFPS server
+_gfps_session = requests.Session()
+_gfps_session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+_GFPS_TIMEOUT = 5  # seconds
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Outbound calls run on a bounded pool. Calls beyond _GFPS_MAX_PENDING are rejected
+# right away, so a slow GFPS server can't tie up every request thread.
+_GFPS_MAX_PENDING = 16
+_GFPS_RESULT_TIMEOUT = 10  # seconds
+_gfps_pool = ThreadPoolExecutor(
+    max_workers=_GFPS_MAX_PENDING, thread_name_prefix="gfps"
+)
+_gfps_slots = BoundedSemaphore(_GFPS_MAX_PENDING)
+
+# GFPS server address, refreshed from the settings at most every _GFPS_ADDR_TTL seconds.
+_GFPS_ADDR_TTL = 5  # seconds
+
+
+def _gfps_base() -> Optional[str]:
+    """Returns the base URL of the GFPS server, or None if its address isn't set"""
+    # Cached per app as (timestamp, base URL), since the settings are per app.
+    # Invalidated by SettingsResource.post when a gfps* setting changes.
+    now = monotonic()
+    cached = current_app.extensions.get("aw_gfps_addr")
+    if cached is None or now - cached[0] > _GFPS_ADDR_TTL:
+        ip = current_app.api.get_setting("gfpsServerIP")
+        port = current_app.api.get_setting("gfpsServerPort")
+        cached = (now, f"http://{ip}:{port}" if ip and port else None)
+        current_app.extensions["aw_gfps_addr"] = cached
+    return cached[1]
+
+
+def _gfps_proxy(method: str, path: str, data=None):
+    """
+    Forwards a request to the GFPS server and returns its JSON response.
+
+    Errors, including a missing server address, are reported in the response body
+    with status 200, as the web UI expects.
+    """
+    base = _gfps_base()
+    if not base:
+        return {"error": "Address for GFPS server not set"}, 200
+    if not _gfps_slots.acquire(blocking=False):
+        return {"status": "error", "message": "Too many pending GFPS requests"}, 200
+    try:
+        future = _gfps_pool.submit(
+            _gfps_session.request,
+            method,
+            base + path,
+            data=None if data is None else orjson.dumps(data),
+            headers=None if data is None else _JSON_HEADERS,
+            timeout=_GFPS_TIMEOUT,
+        )
+    except Exception as e:
+        _gfps_slots.release()
+        return {"status": "error", "message": str(e)}, 200
+    # The slot is held until the outbound call finishes, even if we stop waiting for it
+    future.add_done_callback(lambda _: _gfps_slots.release())
+    try:
+        return orjson.loads(future.result(timeout=_GFPS_RESULT_TIMEOUT).content)
+    except Exception as e:
+        return {"status": "error", "message": str(e) or type(e).__name__}, 200
+
 
 @api.route("/0/gfps/user")
 class GfpsUserResource(Resource):
     def post(self):
-        #check settings
-        if not current_app.api.get_setting("gfpsServerIP") or not current_app.api.get_setting("gfpsServerPort"):
-            return {"error": "Address for GFPS server not set"}, 200
-        data = request.get_json()
-        try:
-            req = requests.post("http://" + current_app.api.get_setting("gfpsServerIP") + ":" + str(
-                current_app.api.get_setting("gfpsServerPort")) + "/api/0/user", json=data,
-                                headers={'Content-Type': 'application/json'})
-            return json.loads(req.text)
-        except Exception as e:
-            return {"status": "error", "message": str(e)}, 200
+        return _gfps_proxy("POST", "/api/0/user", _fast_json())
+
     def put(self):
-        #check settings
-        if not current_app.api.get_setting("gfpsServerIP") or not current_app.api.get_setting("gfpsServerPort"):
-            return {"error": "Address for GFPS server not set"}, 200
-        data = request.get_json()
-        try:
-            req = requests.put("http://" + current_app.api.get_setting("gfpsServerIP") + ":" + str(
-                current_app.api.get_setting("gfpsServerPort")) + "/api/0/user", json=data,
-                               headers={'Content-Type': 'application/json'})
-            return json.loads(req.text)
-        except Exception as e:
-            return {"status": "error", "message": str(e)}, 200
+        return _gfps_proxy("PUT", "/api/0/user", _fast_json())
+
+
 @api.route("/0/gfps/user/<string:user_uuid>")
 class GfpsUserUUIDResource(Resource):
     def get(self, user_uuid):
-        if not current_app.api.get_setting("gfpsServerIP"):
-            return {"error": "Address for GFPS server not set"}, 200
-        try:
-            return requests.get("http://" + current_app.api.get_setting("gfpsServerIP") + ":" + str(current_app.api.get_setting(
-                "gfpsServerPort")) + "/api/0/user/" + user_uuid, headers={'Content-Type': 'application/json'}).json()
-        except Exception as e:
-            return {"status": "error", "message": str(e)}, 200
+        return _gfps_proxy("GET", "/api/0/user/" + user_uuid)
+
 
 @api.route("/0/gfps/status")
 class GfpsStatusResource(Resource):
     def get(self):
-        if not current_app.api.get_setting("gfpsServerIP") or not current_app.api.get_setting("gfpsServerPort"):
-            return {"error": "Address for GFPS server not set"}, 200
-        try:
-            return requests.get("http://" + current_app.api.get_setting("gfpsServerIP") + ":" + str(current_app.api.get_setting(
-                "gfpsServerPort")) + "/api/0/status", headers={'Content-Type': 'application/json'}).json()
-        except Exception as e:
-            return {"status": "error"}, 200
\ No newline at end of file
+        return _gfps_proxy("GET", "/api/0/status")
@@ -1,10 +1,11 @@
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Dict, List
 
 import aw_datastore
 import flask.json.provider
+import orjson
 from aw_datastore import Datastore
 from flask import (
     Blueprint,
@@ -65,18 +66,27 @@ class AWFlask(Flask):
         self.register_blueprint(get_custom_static_blueprint(custom_static))
 
 
-class CustomJSONProvider(flask.json.provider.DefaultJSONProvider):
-    # encoding/decoding of datetime as iso8601 strings
+def _json_default(obj):
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class CustomJSONProvider(flask.json.provider.JSONProvider):
+    # orjson-backed, so jsonify and request.get_json don't go through stdlib json
+    # encoding of datetime as iso8601 strings (done natively by orjson)
     # encoding of timedelta as second floats
-    def default(self, obj, *args, **kwargs):
-        try:
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            if isinstance(obj, timedelta):
-                return obj.total_seconds()
-        except TypeError:
-            pass
-        return super().default(obj)
+    compact = True
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Keys are sorted to match the output of flask's default provider
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+        if not self.compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_json_default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 
 @root.route("/")
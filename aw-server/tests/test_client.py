@@ -48,6 +48,11 @@ def test_export(aw_client):
     # print(export)
 
 
+def test_export_stream(aw_client, bucket):
+    export = aw_client.export_all()
+    assert dict(aw_client.export_all_stream()) == export["buckets"]
+
+
 def _create_heartbeat_events(
     start=datetime.now(tz=timezone.utc), delta=timedelta(seconds=1)
 ):
@@ -1,8 +1,14 @@
+import gzip
 import random
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from threading import BoundedSemaphore
+from types import SimpleNamespace
 
+import orjson
 import pytest
 
+from aw_server import rest
+
 
 @pytest.fixture()
 def bucket(flask_client):
@@ -35,6 +41,109 @@ def test_buckets(flask_client, bucket, benchmark):
         assert len(r.json) == 1
 
 
+def test_buckets_etag(flask_client, bucket):
+    r = flask_client.get("/api/0/buckets/")
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+
+    r = flask_client.get("/api/0/buckets/", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert not r.data
+
+    r = flask_client.post(
+        f"/api/0/buckets/{bucket}/heartbeat?pulsetime=1",
+        json={"timestamp": datetime.now().isoformat(), "data": {}},
+    )
+    assert r.status_code == 200
+    r = flask_client.get("/api/0/buckets/", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert bucket in r.json
+
+
+def test_heartbeat_invalid(flask_client, bucket):
+    for body in [
+        [],
+        {"data": {}},
+        {"timestamp": 0, "data": {}},
+        {"timestamp": "not a timestamp", "data": {}},
+        {"timestamp": datetime.now().isoformat(), "data": []},
+        {"timestamp": datetime.now().isoformat(), "data": {}, "unknown": 1},
+    ]:
+        r = flask_client.post(
+            f"/api/0/buckets/{bucket}/heartbeat?pulsetime=1", json=body
+        )
+        assert r.status_code == 400, body
+
+
+def test_events_invalid(flask_client, bucket):
+    for body in [
+        "not an event",
+        ["not an event"],
+        {"timestamp": "not a timestamp", "data": {}},
+        {"timestamp": datetime.now().isoformat(), "data": {}, "unknown": 1},
+        [{"timestamp": datetime.now().isoformat(), "data": {}}, {"unknown": 1}],
+    ]:
+        r = flask_client.post(f"/api/0/buckets/{bucket}/events", json=body)
+        assert r.status_code == 400, body
+
+
+def test_heartbeat_invalid_pulsetime(flask_client, bucket):
+    body = {"timestamp": datetime.now().isoformat(), "data": {}}
+    r = flask_client.post(f"/api/0/buckets/{bucket}/heartbeat", json=body)
+    assert r.status_code == 400
+    assert "Missing" in r.json["message"]
+
+    r = flask_client.post(f"/api/0/buckets/{bucket}/heartbeat?pulsetime=x", json=body)
+    assert r.status_code == 400
+    assert "Invalid" in r.json["message"]
+
+
+def test_get_events_invalid_args(flask_client, bucket):
+    for args in ["limit=ten", "start=yesterday", "end=2020-13-01"]:
+        r = flask_client.get(f"/api/0/buckets/{bucket}/events?{args}")
+        assert r.status_code == 400, args
+        r = flask_client.get(f"/api/0/buckets/{bucket}/events/count?{args}")
+        assert r.status_code == (200 if args.startswith("limit") else 400), args
+
+
+def test_post_requires_json(app, flask_client, monkeypatch):
+    # Would otherwise be writable cross-origin, as text/plain skips the CORS preflight
+    monkeypatch.setattr(app.api.settings, "data", {})
+    monkeypatch.setattr(app.api.settings, "save", lambda: None)
+    r = flask_client.post(
+        "/api/0/settings/gfpsServerIP", data='"evil.test"', content_type="text/plain"
+    )
+    assert r.status_code == 415
+    assert "gfpsServerIP" not in app.api.settings.data
+
+    r = flask_client.post(
+        "/api/0/buckets/test-text-plain",
+        data='{"client": "test", "type": "test", "hostname": "test"}',
+        content_type="text/plain",
+    )
+    assert r.status_code == 415
+    assert "test-text-plain" not in app.api.get_buckets()
+
+
+def test_delete_bucket_drops_heartbeat_lock(flask_client):
+    r = flask_client.post(
+        "/api/0/buckets/test-lock",
+        json={"client": "test", "type": "test", "hostname": "test"},
+    )
+    assert r.status_code == 200
+    r = flask_client.post(
+        "/api/0/buckets/test-lock/heartbeat?pulsetime=1",
+        json={"timestamp": datetime.now().isoformat(), "data": {}},
+    )
+    assert r.status_code == 200
+    assert "test-lock" in rest._heartbeat_locks
+
+    r = flask_client.delete("/api/0/buckets/test-lock")
+    assert r.status_code == 200
+    assert "test-lock" not in rest._heartbeat_locks
+
+
 def test_heartbeats(flask_client, bucket, benchmark):
     # FIXME: Currently tests using the memory storage method
     # TODO: Test with a longer data section and see if there's a significant difference
@@ -88,4 +197,103 @@ def test_get_events(flask_client, bucket, benchmark):
         assert len(r.json) == n_events
 
 
+def test_get_events_serialization(app, flask_client, bucket):
+    now = datetime.now(timezone.utc)
+    for i, ts in enumerate([now, now.replace(microsecond=0)]):
+        r = flask_client.post(
+            f"/api/0/buckets/{bucket}/events",
+            json={"timestamp": ts.isoformat(), "duration": 1.5, "data": {"i": i}},
+        )
+        assert r.status_code == 200
+
+    r = flask_client.get(f"/api/0/buckets/{bucket}/events")
+    assert r.status_code == 200
+    assert r.mimetype == "application/json"
+    assert r.data == orjson.dumps(app.api.get_events(bucket))
+
+
 # TODO: Add benchmark for basic AFK-filtering query
+
+
+def test_export(flask_client, bucket):
+    r = flask_client.get("/api/0/export")
+    assert r.status_code == 200
+    assert r.mimetype == "application/json"
+    assert bucket in r.json["buckets"]
+
+    r = flask_client.get(f"/api/0/buckets/{bucket}/export")
+    assert r.status_code == 200
+    assert r.mimetype == "application/json"
+    assert list(r.json["buckets"]) == [bucket]
+
+    r = flask_client.get("/api/0/export", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["Content-Encoding"] == "gzip"
+    uncompressed = flask_client.get("/api/0/export").json
+    assert orjson.loads(gzip.decompress(r.data)) == uncompressed
+
+
+@pytest.fixture()
+def gfps(app, monkeypatch):
+    "Points the GFPS proxy at a stubbed server, returns the requests it receives"
+    requests = []
+    responses = {}
+
+    def request(method, url, data=None, headers=None, timeout=None):
+        requests.append((method, url, data))
+        return SimpleNamespace(content=responses.get(url, b'{"status": "ok"}'))
+
+    monkeypatch.setattr(rest._gfps_session, "request", request)
+    monkeypatch.setattr(
+        app.api.settings,
+        "data",
+        {"gfpsServerIP": "gfps.test", "gfpsServerPort": 8080},
+    )
+    app.extensions.pop("aw_gfps_addr", None)
+    yield SimpleNamespace(requests=requests, responses=responses)
+    app.extensions.pop("aw_gfps_addr", None)
+
+
+def test_gfps_address_not_set(app, flask_client, gfps, monkeypatch):
+    monkeypatch.setattr(app.api.settings, "data", {})
+    app.extensions.pop("aw_gfps_addr", None)
+    r = flask_client.get("/api/0/gfps/status")
+    assert r.status_code == 200
+    assert r.json == {"error": "Address for GFPS server not set"}
+    assert not gfps.requests
+
+
+def test_gfps_passthrough(flask_client, gfps):
+    gfps.responses["http://gfps.test:8080/api/0/user/abc"] = b'{"uuid": "abc"}'
+    r = flask_client.get("/api/0/gfps/user/abc")
+    assert r.status_code == 200
+    assert r.json == {"uuid": "abc"}
+
+    r = flask_client.post("/api/0/gfps/user", json={"name": "test"})
+    assert r.status_code == 200
+    assert r.json == {"status": "ok"}
+
+    assert gfps.requests == [
+        ("GET", "http://gfps.test:8080/api/0/user/abc", None),
+        ("POST", "http://gfps.test:8080/api/0/user", b'{"name":"test"}'),
+    ]
+
+
+def test_gfps_invalid_response(flask_client, gfps):
+    gfps.responses["http://gfps.test:8080/api/0/status"] = b"<html>Bad Gateway</html>"
+    r = flask_client.get("/api/0/gfps/status")
+    assert r.status_code == 200
+    assert r.json["status"] == "error"
+
+
+def test_gfps_too_many_pending(flask_client, gfps, monkeypatch):
+    slots = BoundedSemaphore(1)
+    monkeypatch.setattr(rest, "_gfps_slots", slots)
+    slots.acquire()
+    try:
+        r = flask_client.get("/api/0/gfps/status")
+    finally:
+        slots.release()
+    assert r.status_code == 200
+    assert r.json == {"status": "error", "message": "Too many pending GFPS requests"}
+    assert not gfps.requests